@@ -0,0 +1,206 @@
+import base64
+import datetime
+import json
+import time
+from typing import Optional
+from urllib.parse import urlencode
+
+import asyncpg
+from aiohttp import web
+
+
+class ContentAPI:
+    def __init__(self, db_pool, host='127.0.0.1', port=8080, cache_ttl=30, page_size=50, max_page_size=200, cache_max_entries=256, cache_max_bytes=16 * 1024 * 1024):
+        """
+        Read-only HTTP API over the archived content table
+
+        Args:
+            db_pool (asyncpg.Pool): Connection pool shared with CopyBot
+            host (str): Interface to bind the HTTP server to (the API has no authentication)
+            port (int): Port to bind the HTTP server to
+            cache_ttl (int): Seconds a cached response stays valid (0 disables caching)
+            page_size (int): Default number of rows per page
+            max_page_size (int): Upper bound for the `limit` query parameter
+            cache_max_entries (int): Maximum number of cached responses kept in memory
+            cache_max_bytes (int): Maximum total size of cached response bodies
+        """
+        self.db_pool = db_pool
+        self.host = host
+        self.port = port
+        self.cache_ttl = cache_ttl
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+        self.cache_max_entries = cache_max_entries
+        self.cache_max_bytes = cache_max_bytes
+        self.cache = {}
+        self.cache_bytes = 0
+        self.runner = None
+
+        self.app = web.Application()
+        self.app.router.add_get('/health', self.handle_health)
+        self.app.router.add_get('/content', self.handle_list)
+        self.app.router.add_get('/content/search', self.handle_search)
+
+    async def start(self):
+        """Start serving HTTP requests in the background"""
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        print(f"✓ Content API listening on http://{self.host}:{self.port}")
+
+    async def stop(self):
+        """Stop the HTTP server"""
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+    def encode_cursor(self, created_at: datetime.datetime, row_id: int) -> str:
+        """Encode the keyset position of the last row on a page"""
+        raw = f"{created_at.isoformat()}|{row_id}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor: str) -> tuple[datetime.datetime, int]:
+        """Decode a cursor produced by encode_cursor"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            created_at, row_id = base64.urlsafe_b64decode(padded).decode().split('|')
+            created_at, row_id = datetime.datetime.fromisoformat(created_at), int(row_id)
+        except Exception:
+            raise web.HTTPBadRequest(text="Invalid cursor")
+        if not 0 < row_id < 2 ** 63:
+            raise web.HTTPBadRequest(text="Invalid cursor")
+        return created_at, row_id
+
+    def get_limit(self, request: web.Request) -> int:
+        """Parse the `limit` query parameter, clamped to max_page_size"""
+        try:
+            limit = int(request.query.get('limit', self.page_size))
+        except ValueError:
+            raise web.HTTPBadRequest(text="limit must be an integer")
+        return max(1, min(limit, self.max_page_size))
+
+    def get_cache_key(self, request: web.Request) -> str:
+        """Build a cache key from the recognised query parameters in a fixed order"""
+        params = [(name, request.query[name]) for name in ('category', 'channel_id', 'media_type', 'q', 'cursor') if request.query.get(name)]
+        params.append(('limit', str(self.get_limit(request))))
+        return f"{request.path}?{urlencode(params)}"
+
+    def get_cached(self, key: str) -> Optional[bytes]:
+        """Return a cached response body if it has not expired"""
+        entry = self.cache.get(key)
+        if not entry:
+            return None
+        expires_at, body = entry
+        if expires_at < time.monotonic():
+            self.evict_cached(key)
+            return None
+        return body
+
+    def evict_cached(self, key: str):
+        """Remove a cached response body and release its size"""
+        _, body = self.cache.pop(key)
+        self.cache_bytes -= len(body)
+
+    def set_cached(self, key: str, body: bytes):
+        """Store a response body, evicting the oldest entries when over the count or size limit"""
+        if self.cache_ttl <= 0 or len(body) > self.cache_max_bytes:
+            return
+        if key in self.cache:
+            self.evict_cached(key)
+        while self.cache and (len(self.cache) >= self.cache_max_entries or self.cache_bytes + len(body) > self.cache_max_bytes):
+            self.evict_cached(next(iter(self.cache)))
+        self.cache[key] = (time.monotonic() + self.cache_ttl, body)
+        self.cache_bytes += len(body)
+
+    def serialize_row(self, row) -> dict:
+        """Convert a content row into a JSON-friendly dict"""
+        return {
+            'id': row['id'],
+            'text': row['text'],
+            'category': row['category'],
+            'media_links': list(row['media_links'] or []),
+            'media_type': row['media_type'],
+            'message_id': row['message_id'],
+            'channel_id': row['channel_id'],
+            'created_at': row['created_at'].isoformat() if row['created_at'] else None,
+            'updated_at': row['updated_at'].isoformat() if row['updated_at'] else None
+        }
+
+    async def fetch_page(self, request: web.Request, search: Optional[str] = None) -> dict:
+        """Fetch one keyset-paginated page ordered by (created_at, id) descending"""
+        limit = self.get_limit(request)
+        conditions = []
+        params = []
+
+        for column in ('category', 'channel_id', 'media_type'):
+            value = request.query.get(column)
+            if value:
+                params.append(value)
+                conditions.append(f"{column} = ${len(params)}")
+
+        if search:
+            params.append(search)
+            conditions.append(f"search_vector @@ websearch_to_tsquery('simple', ${len(params)})")
+
+        cursor = request.query.get('cursor')
+        if cursor:
+            created_at, row_id = self.decode_cursor(cursor)
+            params.extend([created_at, row_id])
+            conditions.append(f"(created_at, id) < (${len(params) - 1}, ${len(params)})")
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        params.append(limit + 1)
+
+        async with self.db_pool.acquire() as conn:
+            rows = await conn.fetch(f"""
+                SELECT id, text, category, media_links, media_type, message_id, channel_id, created_at, updated_at
+                FROM content
+                {where}
+                ORDER BY created_at DESC, id DESC
+                LIMIT ${len(params)}
+            """, *params)
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = None
+        if has_more and rows:
+            next_cursor = self.encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
+
+        return {
+            'items': [self.serialize_row(row) for row in rows],
+            'next_cursor': next_cursor
+        }
+
+    async def respond(self, request: web.Request, search: Optional[str] = None) -> web.Response:
+        """Serve a page from the cache or the database"""
+        key = self.get_cache_key(request)
+        body = self.get_cached(key)
+        if body is None:
+            try:
+                payload = await self.fetch_page(request, search)
+            except web.HTTPException:
+                raise
+            except asyncpg.DataError:
+                raise web.HTTPBadRequest(text="Invalid query parameters")
+            except Exception as e:
+                print(f"❌ Content API query error: {e}")
+                raise web.HTTPServiceUnavailable(text="Database unavailable")
+            body = json.dumps(payload, ensure_ascii=False).encode()
+            self.set_cached(key, body)
+        return web.Response(body=body, content_type='application/json')
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        """Liveness check"""
+        return web.json_response({'status': 'ok'})
+
+    async def handle_list(self, request: web.Request) -> web.Response:
+        """GET /content?category=&channel_id=&media_type=&limit=&cursor="""
+        return await self.respond(request)
+
+    async def handle_search(self, request: web.Request) -> web.Response:
+        """GET /content/search?q=&category=&channel_id=&media_type=&limit=&cursor="""
+        query = request.query.get('q', '').strip()
+        if not query:
+            raise web.HTTPBadRequest(text="q parameter is required")
+        return await self.respond(request, search=query)
@@ -1,14 +1,87 @@
 import os
 import json
+import signal
 import asyncio
 from copybot import CopyBot
+from api import ContentAPI
 from pyrogram import Client
-from dotenv import load_dotenv
+from dotenv import load_dotenv, find_dotenv, dotenv_values
 
-load_dotenv()
+# An explicit ENV_FILE (e.g. /app/config/.env in docker-compose) is authoritative over the process environment
+ENV_FILE = os.getenv('ENV_FILE') or find_dotenv()
+load_dotenv(ENV_FILE, override=bool(os.getenv('ENV_FILE')))
+
+ROUTING_KEYS = ('SOURCE_CHANNELS', 'TARGET_CHANNEL', 'TOPIC_FILTERS', 'CHECK_LIMIT')
 
 topic_filters = {}
 
+def load_routing_config():
+    """Read channel routing and filters from the environment"""
+    source_channels_json = os.getenv('SOURCE_CHANNELS')
+    if not source_channels_json:
+        raise Exception("SOURCE_CHANNELS not found in .env")
+    
+    source_channels = json.loads(source_channels_json)
+    if not isinstance(source_channels, list) or not source_channels:
+        raise Exception("SOURCE_CHANNELS must be a non-empty JSON array of channel usernames/IDs")
+    
+    target_channel = os.getenv('TARGET_CHANNEL')
+    if not target_channel:
+        raise Exception("TARGET_CHANNEL not found in .env")
+    
+    filters = dict(topic_filters)
+    topic_filters_json = os.getenv('TOPIC_FILTERS')
+    if topic_filters_json:
+        filters = {int(channel_id): int(topic_id) for channel_id, topic_id in json.loads(topic_filters_json).items()}
+    
+    return {
+        'source_channels': source_channels,
+        'target_channel': target_channel,
+        'topic_filters': filters,
+        'check_limit': int(os.getenv('CHECK_LIMIT', 10))
+    }
+
+def reload_config(copy_bot):
+    """Re-read .env and queue the new routing config on the bot"""
+    try:
+        if ENV_FILE and os.path.exists(ENV_FILE):
+            # load_dotenv never unsets variables, so drop routing keys removed from the file
+            values = dotenv_values(ENV_FILE)
+            for key in ROUTING_KEYS:
+                if key not in values:
+                    os.environ.pop(key, None)
+            load_dotenv(ENV_FILE, override=True)
+        else:
+            print(f"⚠️  Config file {ENV_FILE or '.env'} not found - reloading from the unchanged process environment")
+        copy_bot.request_reload(load_routing_config())
+    except Exception as e:
+        print(f"❌ Config reload failed, keeping current config: {e}")
+
+def handle_stop_signal(copy_bot):
+    """Drain on the first SIGINT/SIGTERM; restore default handlers so a second one force-quits"""
+    loop = asyncio.get_running_loop()
+    loop.remove_signal_handler(signal.SIGINT)
+    loop.remove_signal_handler(signal.SIGTERM)
+    copy_bot.request_shutdown()
+    print("   Press Ctrl+C again to force quit")
+
+async def watch_config(copy_bot, interval):
+    """Reload config whenever the .env file changes"""
+    if not ENV_FILE or not os.path.exists(ENV_FILE):
+        return
+    
+    last_mtime = os.path.getmtime(ENV_FILE)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            mtime = os.path.getmtime(ENV_FILE)
+        except OSError:
+            continue
+        if mtime != last_mtime:
+            last_mtime = mtime
+            print(f"📝 {ENV_FILE} changed")
+            reload_config(copy_bot)
+
 async def main():
     try:
         API_ID = os.getenv('API_ID')
@@ -39,19 +112,26 @@ async def main():
             print("⚠️  R2 storage not configured - media will not be uploaded to R2")
             r2_config = None
         
-        source_channels_json = os.getenv('SOURCE_CHANNELS')
-        if not source_channels_json:
-            raise Exception("SOURCE_CHANNELS not found in .env")
-        
-        source_channels = json.loads(source_channels_json)
-        if not isinstance(source_channels, list) or not source_channels:
-            raise Exception("SOURCE_CHANNELS must be a non-empty JSON array of channel usernames/IDs")
+        config = load_routing_config()
+        source_channels = config['source_channels']
+        target_channel = config['target_channel']
+        check_limit = config['check_limit']
+        config_reload_interval = int(os.getenv('CONFIG_RELOAD_INTERVAL', 5))
+        env_file_found = bool(ENV_FILE) and os.path.exists(ENV_FILE)
+        if os.getenv('ENV_FILE') and not env_file_found:
+            print(f"⚠️  ENV_FILE {ENV_FILE} not found - using process environment only, live config reload disabled")
         
-        target_channel = os.getenv('TARGET_CHANNEL')
-        if not target_channel:
-            raise Exception("TARGET_CHANNEL not found in .env")
+        retention_months = os.getenv('RETENTION_MONTHS')
+        retention_months = int(retention_months) if retention_months else None
+        if retention_months is not None and retention_months < 1:
+            raise Exception("RETENTION_MONTHS must be 1 or greater")
+        retention_mode = os.getenv('RETENTION_MODE', 'drop')
+        if retention_mode not in ('drop', 'archive'):
+            raise Exception("RETENTION_MODE must be 'drop' or 'archive'")
         
-        check_limit = int(os.getenv('CHECK_LIMIT', 10))
+        api_port = os.getenv('API_PORT')
+        api_host = os.getenv('API_HOST', '127.0.0.1')
+        api_cache_ttl = int(os.getenv('API_CACHE_TTL', 30))
         
         copy_bot = CopyBot(
             source_channels, 
@@ -59,18 +139,32 @@ async def main():
             API_ID, 
             API_HASH, 
             check_limit,
-            topic_filters=topic_filters,
+            topic_filters=config['topic_filters'],
             database_url=DATABASE_URL,
-            r2_config=r2_config
+            r2_config=r2_config,
+            retention_months=retention_months,
+            retention_mode=retention_mode
         )
         
         await copy_bot.auth()
         
+        content_api = None
+        if api_port and copy_bot.db_pool:
+            content_api = ContentAPI(
+                copy_bot.db_pool,
+                host=api_host,
+                port=int(api_port),
+                cache_ttl=api_cache_ttl
+            )
+            await content_api.start()
+        elif api_port:
+            print("⚠️  API_PORT set but database is unavailable - content API disabled")
+        
         print("=" * 60)
         print("\n✅ Bot started successfully!")
         print(f"📋 Monitoring channels: {source_channels}")
         print(f"🎯 Copying to: {target_channel}")
-        print(f"🔍 Topic filters: {topic_filters if topic_filters else 'None (copying all topics)'}")
+        print(f"🔍 Topic filters: {config['topic_filters'] if config['topic_filters'] else 'None (copying all topics)'}")
         print(f"⏱️  Check interval: 2 seconds")
         print(f"📋 Check limit: {check_limit} messages per channel")
         print(f"💾 Database: {'Neon DB (PostgreSQL)' if DATABASE_URL else 'Disabled'}")
@@ -78,12 +172,32 @@ async def main():
             print(f"☁️  Storage: Cloudflare R2 (Bucket: {r2_config['bucket_name']})")
         else:
             print(f"☁️  Storage: R2 Disabled")
+        print(f"🗄️  Retention: {f'{retention_months} months ({retention_mode})' if retention_months is not None else 'Disabled'}")
+        print(f"🌐 Content API: {f'{api_host}:{api_port} (cache TTL {api_cache_ttl}s)' if content_api else 'Disabled'}")
+        if env_file_found:
+            print(f"🔄 Config reload: SIGHUP{f' or {ENV_FILE} change (every {config_reload_interval}s)' if config_reload_interval > 0 else ''}")
+        else:
+            print(f"🔄 Config reload: Disabled (no config file found, SIGHUP re-reads the process environment only)")
         print("\n🤖 Bot is now running... Press Ctrl+C to stop\n")
         
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGTERM, handle_stop_signal, copy_bot)
+        loop.add_signal_handler(signal.SIGINT, handle_stop_signal, copy_bot)
+        loop.add_signal_handler(signal.SIGHUP, reload_config, copy_bot)
+        
+        watch_task = None
+        if env_file_found and config_reload_interval > 0:
+            watch_task = asyncio.create_task(watch_config(copy_bot, config_reload_interval))
+        
         try:
             await copy_bot.start()
         finally:
+            if watch_task:
+                watch_task.cancel()
+            if content_api:
+                await content_api.stop()
             await copy_bot.cleanup()
+            print("✓ Bot stopped cleanly")
         
     except KeyboardInterrupt:
         print("\n\n⚠️  Bot stopped by user")
@@ -93,4 +207,7 @@ async def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Bot force-stopped by user")
\ No newline at end of file
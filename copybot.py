@@ -25,7 +25,8 @@ from pyrogram.types import Message
 from pyrogram.errors import PeerIdInvalid
 
 class CopyBot:
-    def __init__(self, source_channels, target_channel, api_id, api_hash, check_limit=10, topic_filters=None, database_url=None, r2_config=None):
+    def __init__(self, source_channels, target_channel, api_id, api_hash, check_limit=10, topic_filters=None, database_url=None, r2_config=None,
+                 retention_months=None, retention_mode='drop', retention_batch_size=500, maintenance_interval=3600):
         """
         Initialize with source channels and target channel
  
@@ -39,6 +40,12 @@ class CopyBot:
                                  Example: {-1002651608009: 221}
             database_url (str): PostgreSQL connection string for Neon DB
             r2_config (dict): Cloudflare R2 configuration
+            retention_months (int): Keep this many full months of content besides the current one
+                                    (None disables retention, minimum 1)
+            retention_mode (str): 'drop' deletes expired partitions and their R2 objects,
+                                  'archive' detaches them as content_archive_YYYY_MM tables
+            retention_batch_size (int): Rows scanned per batch when deleting R2 objects
+            maintenance_interval (int): Seconds between partition maintenance runs
         """
         self.source_channels = source_channels
         self.target_channel = target_channel
@@ -51,6 +58,14 @@ class CopyBot:
         self.app = None
         self.db_pool = None
         self.r2_session = None
+        self.retention_months = retention_months
+        self.retention_mode = retention_mode
+        self.retention_batch_size = retention_batch_size
+        self.maintenance_interval = maintenance_interval
+        self.maintenance_task = None
+        self.has_processed_messages = False
+        self.shutdown_event = asyncio.Event()
+        self.pending_config = None
         
         if self.r2_config.get('access_key_id'):
             self.r2_session = aioboto3.Session(
@@ -64,13 +79,17 @@ class CopyBot:
         self.forwarded_media_groups = {}
         
         for channel in source_channels:
-            self.source_data[channel] = {
-                'last_msg_id': None,
-                'last_msg_obj': None,
-                'target_channel': target_channel
-            }
-            self.last_forwarded_msg_ids[channel] = 0
-            self.forwarded_media_groups[channel] = set()
+            self.init_channel_state(channel)
+
+    def init_channel_state(self, channel):
+        """Create per-channel tracking state, keeping any existing state for the channel"""
+        self.source_data.setdefault(channel, {
+            'last_msg_id': None,
+            'last_msg_obj': None,
+            'target_channel': self.target_channel
+        })
+        self.last_forwarded_msg_ids.setdefault(channel, 0)
+        self.forwarded_media_groups.setdefault(channel, set())
 
     async def connect_db(self):
         """Connect to Neon DB with connection pooling"""
@@ -87,30 +106,70 @@ class CopyBot:
                 max_inactive_connection_lifetime=300
             )
             print("✓ Connected to Neon DB")
+            
+            async with self.db_pool.acquire() as conn:
+                self.has_processed_messages = await conn.fetchval("SELECT to_regclass('processed_messages') IS NOT NULL")
+            if not self.has_processed_messages:
+                print("⚠️  processed_messages table missing - apply schema.sql; dedup falls back to the content table")
             return True
         except Exception as e:
             print(f"❌ Neon DB connection error: {e}")
             return False
 
     async def cleanup(self):
-        """Clean up connections"""
+        """Clean up connections and flush the Telegram session"""
+        if self.maintenance_task:
+            self.maintenance_task.cancel()
+            try:
+                await self.maintenance_task
+            except asyncio.CancelledError:
+                pass
+            self.maintenance_task = None
         if self.db_pool:
             await self.db_pool.close()
+        if self.app and self.app.is_connected:
+            await self.app.stop()
 
-    async def is_content_duplicate(self, message_id, channel_id):
-        """Check if specific message ID from channel was already processed"""
+    async def is_content_duplicate(self, message_id, channel_id, message_date=None):
+        """Check if specific message ID from channel was already processed
+
+        processed_messages is never touched by retention, so messages from
+        dropped partitions are still recognised. Without it, the lookup falls
+        back to content; a row is always saved after its message was posted,
+        so message_date bounds created_at and lets Postgres skip older partitions.
+        """
         if not self.db_pool:
             return False
         
+        if self.has_processed_messages:
+            try:
+                async with self.db_pool.acquire() as conn:
+                    return await conn.fetchval("""
+                        SELECT EXISTS(
+                            SELECT 1 FROM processed_messages
+                            WHERE message_id = $1 AND channel_id = $2
+                        )
+                    """, message_id, str(channel_id))
+            except Exception as e:
+                print(f"❌ Error checking duplicate: {e}")
+                return False
+        
+        params = [message_id, str(channel_id)]
+        date_filter = ""
+        if message_date:
+            # One day of slack for clock skew between Telegram and the database
+            params.append(message_date.astimezone(datetime.timezone.utc) - datetime.timedelta(days=1))
+            date_filter = "AND created_at >= $3"
+        
         try:
             async with self.db_pool.acquire() as conn:
-                result = await conn.fetchval("""
+                result = await conn.fetchval(f"""
                     SELECT EXISTS(
                         SELECT 1 FROM content 
-                        WHERE message_id = $1 AND channel_id = $2
+                        WHERE message_id = $1 AND channel_id = $2 {date_filter}
                         LIMIT 1
                     )
-                """, message_id, str(channel_id))
+                """, *params)
                 return result
         except Exception as e:
             print(f"❌ Error checking duplicate: {e}")
@@ -123,10 +182,17 @@ class CopyBot:
         
         try:
             async with self.db_pool.acquire() as conn:
-                await conn.execute("""
-                    INSERT INTO content (text, category, media_links, media_type, message_id, channel_id)
-                    VALUES ($1, $2, $3, $4, $5, $6)
-                """, text, category, media_links or [], media_type, message_id, str(channel_id))
+                async with conn.transaction():
+                    await conn.execute("""
+                        INSERT INTO content (text, category, media_links, media_type, message_id, channel_id)
+                        VALUES ($1, $2, $3, $4, $5, $6)
+                    """, text, category, media_links or [], media_type, message_id, str(channel_id))
+                    if self.has_processed_messages and message_id is not None:
+                        await conn.execute("""
+                            INSERT INTO processed_messages (message_id, channel_id)
+                            VALUES ($1, $2)
+                            ON CONFLICT DO NOTHING
+                        """, message_id, str(channel_id))
                 return True
         except Exception as e:
             print(f"❌ Error saving content: {e}")
@@ -162,9 +228,168 @@ class CopyBot:
             print(f"  ❌ Error uploading to R2: {e}")
             return None
 
-    async def check_content_duplicate(self, message_id, channel_id):
+    def get_r2_key_from_url(self, url: str) -> Optional[str]:
+        """Map a public R2 URL saved in media_links back to its object key"""
+        prefix = f"{self.r2_config.get('public_url', '')}/"
+        if url and url.startswith(prefix):
+            return url[len(prefix):]
+        return None
+
+    async def delete_from_r2(self, keys: List[str]) -> int:
+        """Delete objects from Cloudflare R2 in chunks of up to 1000 keys"""
+        if not self.r2_session or not keys:
+            return 0
+        
+        deleted = 0
+        try:
+            async with self.r2_session.client(
+                's3',
+                endpoint_url=f"https://{self.r2_config['account_id']}.r2.cloudflarestorage.com",
+                region_name='auto'
+            ) as s3:
+                for i in range(0, len(keys), 1000):
+                    chunk = keys[i:i + 1000]
+                    response = await s3.delete_objects(
+                        Bucket=self.r2_config['bucket_name'],
+                        Delete={'Objects': [{'Key': key} for key in chunk], 'Quiet': True}
+                    )
+                    errors = response.get('Errors', [])
+                    for error in errors[:5]:
+                        print(f"  ❌ Error deleting {error.get('Key')} from R2: {error.get('Code')} {error.get('Message')}")
+                    deleted += len(chunk) - len(errors)
+        except Exception as e:
+            print(f"  ❌ Error deleting from R2: {e}")
+        return deleted
+
+    async def is_content_partitioned(self) -> bool:
+        """Check whether the content table uses the partitioned layout from schema.sql"""
+        async with self.db_pool.acquire() as conn:
+            relkind = await conn.fetchval("SELECT relkind FROM pg_class WHERE oid = to_regclass('content')")
+            return relkind == 'p'
+
+    async def ensure_content_partitions(self):
+        """Create partitions for the current and next month ahead of time"""
+        async with self.db_pool.acquire() as conn:
+            await conn.execute("SELECT ensure_content_partition(CURRENT_TIMESTAMP)")
+            await conn.execute("SELECT ensure_content_partition(CURRENT_TIMESTAMP + INTERVAL '1 month')")
+
+    async def get_expired_partitions(self) -> List[str]:
+        """List monthly partitions older than the retention window"""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        months = now.year * 12 + now.month - 1 - self.retention_months
+        cutoff = (months // 12, months % 12 + 1)
+        
+        async with self.db_pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT c.relname
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'content'::regclass
+            """)
+        
+        expired = []
+        for row in rows:
+            match = re.fullmatch(r'content_(\d{4})_(\d{2})', row['relname'])
+            if match and (int(match.group(1)), int(match.group(2))) < cutoff:
+                expired.append(row['relname'])
+        return sorted(expired)
+
+    async def delete_partition_media(self, partition: str) -> int:
+        """Delete R2 objects referenced by a partition, one batch of rows at a time"""
+        if not self.r2_session:
+            return 0
+        
+        deleted = 0
+        last_id = 0
+        while True:
+            async with self.db_pool.acquire() as conn:
+                rows = await conn.fetch(f"""
+                    SELECT id, media_links FROM {partition}
+                    WHERE id > $1 AND cardinality(media_links) > 0
+                    ORDER BY id
+                    LIMIT $2
+                """, last_id, self.retention_batch_size)
+            if not rows:
+                break
+            
+            last_id = rows[-1]['id']
+            keys = [key for row in rows for key in map(self.get_r2_key_from_url, row['media_links']) if key]
+            batch_deleted = await self.delete_from_r2(keys)
+            if batch_deleted < len(keys):
+                raise Exception(f"R2 deletion incomplete for {partition}, keeping partition")
+            deleted += batch_deleted
+            await asyncio.sleep(1)
+        return deleted
+
+    async def expire_partition(self, partition: str):
+        """Drop or archive a single expired partition"""
+        if self.retention_mode == 'archive':
+            async with self.db_pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.execute(f"ALTER TABLE content DETACH PARTITION {partition}")
+                    await conn.execute(f"ALTER TABLE {partition} RENAME TO content_archive_{partition[len('content_'):]}")
+            print(f"  ✓ Archived partition {partition}")
+            return
+        
+        deleted = await self.delete_partition_media(partition)
+        async with self.db_pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(f"ALTER TABLE content DETACH PARTITION {partition}")
+                await conn.execute(f"DROP TABLE {partition}")
+        print(f"  ✓ Dropped partition {partition} ({deleted} R2 objects deleted)")
+
+    async def check_default_partition(self):
+        """Warn when rows landed in content_default, which blocks creating partitions for their months"""
+        try:
+            async with self.db_pool.acquire() as conn:
+                oldest, newest = await conn.fetchrow("SELECT min(created_at), max(created_at) FROM content_default")
+        except Exception as e:
+            print(f"❌ Error checking content_default: {e}")
+            return
+        
+        if oldest:
+            print(f"⚠️  content_default holds rows from {oldest:%Y-%m-%d} to {newest:%Y-%m-%d}. "
+                  f"Partitions for those months cannot be created and retention will not remove them; "
+                  f"move the rows out manually (detach content_default, create the partitions, re-insert)")
+
+    async def run_partition_maintenance(self):
+        """Pre-create upcoming partitions and expire old ones"""
+        try:
+            await self.ensure_content_partitions()
+        except Exception as e:
+            print(f"❌ Error creating content partitions: {e}")
+        
+        await self.check_default_partition()
+        
+        if self.retention_months is None:
+            return
+        
+        for partition in await self.get_expired_partitions():
+            try:
+                await self.expire_partition(partition)
+            except Exception as e:
+                print(f"❌ Error expiring partition {partition}: {e}")
+
+    async def partition_maintenance_loop(self):
+        """Run partition maintenance in the background every maintenance_interval seconds"""
+        try:
+            if not await self.is_content_partitioned():
+                print("⚠️  content table is not partitioned - run migrate_content_partitions.sql to enable retention")
+                return
+        except Exception as e:
+            print(f"❌ Error checking content partitioning: {e}")
+            return
+        
+        while True:
+            try:
+                await self.run_partition_maintenance()
+            except Exception as e:
+                print(f"❌ Error in partition maintenance: {e}")
+            await asyncio.sleep(self.maintenance_interval)
+
+    async def check_content_duplicate(self, message_id, channel_id, message_date=None):
         """Check if message was already processed"""
-        return await self.is_content_duplicate(message_id, channel_id)
+        return await self.is_content_duplicate(message_id, channel_id, message_date)
 
     async def download_media(self, message: Message) -> Optional[bytes]:
         """Download media from message with timeout"""
@@ -364,6 +589,47 @@ class CopyBot:
             print(f"  ⚠ Error loading dialogs: {e}")
         return False
 
+    async def verify_source_channel(self, channel, refresh_peers=False) -> bool:
+        """Check that a source channel is accessible and report its topic filter
+
+        Args:
+            channel: Channel username/ID as configured in SOURCE_CHANNELS
+            refresh_peers (bool): Scan dialogs for the channel if its peer is not cached yet
+        """
+        try:
+            if isinstance(channel, str) and channel.lstrip('-').isdigit():
+                channel_id = int(channel)
+            else:
+                channel_id = channel
+            
+            try:
+                chat = await self.app.get_chat(channel_id)
+            except PeerIdInvalid:
+                if not refresh_peers or not await self.resolve_peer_cache(channel_id):
+                    raise
+                chat = await self.app.get_chat(channel_id)
+            print(f"  ✓ {chat.title} (ID: {chat.id})")
+            
+            if channel_id in self.topic_filters:
+                topic_id = self.topic_filters[channel_id]
+                print(f"    → Topic filter active: only copying from topic {topic_id}")
+                
+                count = 0
+                topic_count = 0
+                async for message in self.app.get_chat_history(channel_id, limit=20):
+                    count += 1
+                    msg_topic = self.get_message_topic(message)
+                    if msg_topic == topic_id:
+                        topic_count += 1
+                print(f"    → Found {topic_count}/{count} recent messages in topic {topic_id}")
+            return True
+            
+        except PeerIdInvalid:
+            print(f"  ✗ Cannot access {channel} - not a member or invalid ID")
+        except Exception as e:
+            print(f"  ✗ Failed to resolve {channel}: {e}")
+        return False
+
     async def auth(self):
         """Authenticate with Telegram and connect to database"""
         try:
@@ -385,33 +651,7 @@ class CopyBot:
             
             print("Verifying source channels:")
             for channel in self.source_channels[:]:
-                try:
-                    if isinstance(channel, str) and channel.lstrip('-').isdigit():
-                        channel_id = int(channel)
-                    else:
-                        channel_id = channel
-                    
-                    chat = await self.app.get_chat(channel_id)
-                    print(f"  ✓ {chat.title} (ID: {chat.id})")
-                    
-                    if channel_id in self.topic_filters:
-                        topic_id = self.topic_filters[channel_id]
-                        print(f"    → Topic filter active: only copying from topic {topic_id}")
-                        
-                        count = 0
-                        topic_count = 0
-                        async for message in self.app.get_chat_history(channel_id, limit=20):
-                            count += 1
-                            msg_topic = self.get_message_topic(message)
-                            if msg_topic == topic_id:
-                                topic_count += 1
-                        print(f"    → Found {topic_count}/{count} recent messages in topic {topic_id}")
-                        
-                except PeerIdInvalid:
-                    print(f"  ✗ Cannot access {channel} - not a member or invalid ID")
-                    self.source_channels.remove(channel)
-                except Exception as e:
-                    print(f"  ✗ Failed to resolve {channel}: {e}")
+                if not await self.verify_source_channel(channel):
                     self.source_channels.remove(channel)
 
             if not self.source_channels:
@@ -432,6 +672,8 @@ class CopyBot:
     async def get_source_last_posts(self):
         """Get and process last posts from all source channels"""
         for channel in self.source_channels:
+            if self.shutdown_event.is_set():
+                return
             try:
                 if isinstance(channel, str) and channel.lstrip('-').isdigit():
                     channel_id = int(channel)
@@ -461,6 +703,8 @@ class CopyBot:
                             standalone_messages.append(message)
                     
                     for media_group_id, group_messages in media_groups.items():
+                        if self.shutdown_event.is_set():
+                            return
                         if media_group_id in self.forwarded_media_groups.get(channel, set()):
                             continue
                         
@@ -473,6 +717,8 @@ class CopyBot:
                             await asyncio.sleep(1)
                     
                     for message in standalone_messages:
+                        if self.shutdown_event.is_set():
+                            return
                         self.source_data[channel]['last_msg_id'] = message.id
                         self.source_data[channel]['last_msg_obj'] = message
                         count = await self.match_messages(channel)
@@ -528,7 +774,7 @@ class CopyBot:
                 channel_id = channel
 
             check_msg_id = messages_to_process[-1].id if is_media_group else current_msg_id
-            if await self.check_content_duplicate(check_msg_id, channel_id):
+            if await self.check_content_duplicate(check_msg_id, channel_id, first_msg.date):
                 print(f"  ⊘ Skipping duplicate message (already processed)")
                 for msg in messages_to_process:
                     if msg.id > self.last_forwarded_msg_ids.get(channel, 0):
@@ -609,15 +855,73 @@ class CopyBot:
         now = datetime.datetime.now()
         return now.strftime("%Y-%m-%d %H:%M:%S")
 
+    def request_shutdown(self):
+        """Stop polling after in-flight forwards and uploads finish"""
+        if not self.shutdown_event.is_set():
+            print("\n⚠️  Shutdown requested - finishing in-flight messages...")
+            self.shutdown_event.set()
+
+    def request_reload(self, config: dict):
+        """Queue new routing config to be applied between polling cycles
+
+        Args:
+            config (dict): Keys source_channels, target_channel, topic_filters, check_limit
+        """
+        self.pending_config = config
+
+    async def apply_config(self, config: dict):
+        """Apply reloaded routing config, verifying only newly added channels"""
+        print(f"[{self.get_current_datetime()}] 🔄 Reloading configuration...")
+        self.topic_filters = config['topic_filters']
+        self.check_limit = config['check_limit']
+        
+        target_channel = config['target_channel']
+        if target_channel != self.target_channel:
+            try:
+                chat = await self.app.get_chat(target_channel)
+                print(f"  ✓ Target channel: {chat.title} (ID: {chat.id})")
+                self.target_channel = target_channel
+                for data in self.source_data.values():
+                    data['target_channel'] = target_channel
+            except Exception as e:
+                print(f"  ✗ Cannot access target channel {target_channel}, keeping {self.target_channel}: {e}")
+        
+        source_channels = []
+        for channel in config['source_channels']:
+            if channel in self.source_channels:
+                source_channels.append(channel)
+            elif await self.verify_source_channel(channel, refresh_peers=True):
+                self.init_channel_state(channel)
+                source_channels.append(channel)
+        
+        if not source_channels:
+            print("  ✗ No valid source channels in new config, keeping current channels")
+            return
+        
+        removed = [channel for channel in self.source_channels if channel not in source_channels]
+        for channel in removed:
+            print(f"  − Stopped monitoring {channel}")
+        self.source_channels = source_channels
+        print(f"  ✓ Monitoring channels: {self.source_channels}")
+
     async def start(self):
-        """Start the copying process"""
+        """Start the copying process and run until shutdown is requested"""
+        if self.db_pool and not self.maintenance_task:
+            self.maintenance_task = asyncio.create_task(self.partition_maintenance_loop())
+        
         try:
-            while True:
+            while not self.shutdown_event.is_set():
+                if self.pending_config:
+                    config, self.pending_config = self.pending_config, None
+                    await self.apply_config(config)
+                
                 await self.get_source_last_posts()
-                await asyncio.sleep(2)  # Check every 2 seconds
-        except KeyboardInterrupt:
-            print("\n⚠️  Stopping bot...")
-            raise
+                
+                try:
+                    await asyncio.wait_for(self.shutdown_event.wait(), timeout=2)  # Check every 2 seconds
+                except asyncio.TimeoutError:
+                    pass
+            print("✓ In-flight messages finished")
         except Exception as e:
             print(f"❌ Error in start method: {e}")
-            raise
\ No newline at end of file
+            raise
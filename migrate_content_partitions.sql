@@ -0,0 +1,75 @@
+-- One-off migration from the unpartitioned content table to the monthly
+-- partitioned layout in schema.sql. Stop the bot first, then run:
+--
+--   1. psql "$DATABASE_URL" -f migrate_content_partitions.sql
+--   2. psql "$DATABASE_URL" -f schema.sql
+--   3. psql "$DATABASE_URL" -c "CALL migrate_content_legacy(5000);"
+--
+-- Step 3 moves rows in batches, committing after each one, and drops
+-- content_legacy once it is empty. It can be interrupted and re-run.
+
+BEGIN;
+
+ALTER TABLE content RENAME TO content_legacy;
+ALTER SEQUENCE content_id_seq RENAME TO content_legacy_id_seq;
+ALTER TABLE content_legacy RENAME CONSTRAINT content_pkey TO content_legacy_pkey;
+ALTER TABLE content_legacy DROP CONSTRAINT IF EXISTS content_message_id_channel_id_key;
+
+DROP TRIGGER IF EXISTS update_content_updated_at ON content_legacy;
+DROP INDEX IF EXISTS idx_content_category;
+DROP INDEX IF EXISTS idx_content_created_at;
+DROP INDEX IF EXISTS idx_content_media_type;
+DROP INDEX IF EXISTS idx_content_created_at_id;
+DROP INDEX IF EXISTS idx_content_category_created_at;
+DROP INDEX IF EXISTS idx_content_channel_created_at;
+DROP INDEX IF EXISTS idx_content_media_type_created_at;
+DROP INDEX IF EXISTS idx_content_search_vector;
+DROP INDEX IF EXISTS idx_content_message_channel;
+
+COMMIT;
+
+CREATE OR REPLACE PROCEDURE migrate_content_legacy(batch_size INT DEFAULT 5000)
+AS $$
+DECLARE
+    month_ts TIMESTAMP WITH TIME ZONE;
+BEGIN
+    FOR month_ts IN
+        SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+        FROM content_legacy
+        WHERE created_at IS NOT NULL
+    LOOP
+        PERFORM ensure_content_partition(month_ts);
+    END LOOP;
+    COMMIT;
+
+    PERFORM setval(
+        pg_get_serial_sequence('content', 'id'),
+        GREATEST((SELECT max(id) FROM content_legacy), (SELECT max(id) FROM content), 1)
+    );
+    COMMIT;
+
+    LOOP
+        WITH batch AS (
+            DELETE FROM content_legacy
+            WHERE id IN (SELECT id FROM content_legacy ORDER BY id LIMIT batch_size)
+            RETURNING id, text, category, media_links, media_type, message_id, channel_id, created_at, updated_at
+        ),
+        moved AS (
+            INSERT INTO content (id, text, category, media_links, media_type, message_id, channel_id, created_at, updated_at)
+            SELECT id, text, category, media_links, media_type, message_id, channel_id,
+                   COALESCE(created_at, updated_at, CURRENT_TIMESTAMP), updated_at
+            FROM batch
+            RETURNING message_id, channel_id
+        )
+        INSERT INTO processed_messages (message_id, channel_id)
+        SELECT message_id, channel_id FROM moved
+        WHERE message_id IS NOT NULL AND channel_id IS NOT NULL
+        ON CONFLICT DO NOTHING;
+
+        COMMIT;
+        EXIT WHEN NOT EXISTS (SELECT 1 FROM content_legacy);
+    END LOOP;
+
+    DROP TABLE content_legacy;
+END;
+$$ language 'plpgsql';
@@ -0,0 +1,39 @@
+-- Adds the read API's search column and indexes to an existing unpartitioned
+-- content table, for installs not yet running migrate_content_partitions.sql.
+--
+-- Step 1 rewrites the whole table under an ACCESS EXCLUSIVE lock (a STORED
+-- generated column cannot be added any other way), so run it in a maintenance
+-- window with the bot stopped. Step 2 builds indexes without blocking inserts;
+-- CREATE INDEX CONCURRENTLY cannot run inside a transaction, so run this file
+-- with plain psql (no --single-transaction):
+--
+--   psql "$DATABASE_URL" -f migrate_content_search.sql
+
+-- Step 1: maintenance window
+ALTER TABLE content ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('simple', coalesce(text, ''))) STORED;
+
+-- Step 2: online, the bot can be restarted before this runs
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_content_created_at_id ON content(created_at DESC, id DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_content_category_created_at ON content(category, created_at DESC, id DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_content_channel_created_at ON content(channel_id, created_at DESC, id DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_content_media_type_created_at ON content(media_type, created_at DESC, id DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_content_search_vector ON content USING GIN(search_vector);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_content_category;
+DROP INDEX CONCURRENTLY IF EXISTS idx_content_created_at;
+DROP INDEX CONCURRENTLY IF EXISTS idx_content_media_type;
+
+CREATE OR REPLACE VIEW recent_content AS
+SELECT 
+    id,
+    text,
+    category,
+    media_links,
+    media_type,
+    message_id,
+    channel_id,
+    created_at,
+    updated_at
+FROM content
+ORDER BY created_at DESC, id DESC;
@@ -1,21 +1,65 @@
+-- Range-partitioned by month on created_at. Existing unpartitioned installs
+-- must run migrate_content_partitions.sql before applying this file
+-- (or migrate_content_search.sql to stay unpartitioned for now).
 CREATE TABLE IF NOT EXISTS content (
-    id BIGSERIAL PRIMARY KEY,
+    id BIGSERIAL,
     text TEXT NOT NULL,
     category TEXT,
     media_links TEXT[] DEFAULT '{}',
     media_type TEXT,
     message_id BIGINT,
     channel_id TEXT,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE(message_id, channel_id)
-);
+    search_vector tsvector GENERATED ALWAYS AS (to_tsvector('simple', coalesce(text, ''))) STORED,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE OR REPLACE FUNCTION ensure_content_partition(month_ts TIMESTAMP WITH TIME ZONE)
+RETURNS TEXT AS $$
+DECLARE
+    month_start TIMESTAMP := date_trunc('month', month_ts AT TIME ZONE 'UTC');
+    partition_name TEXT := 'content_' || to_char(month_start, 'YYYY_MM');
+BEGIN
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF content FOR VALUES FROM (%L) TO (%L)',
+        partition_name,
+        month_start AT TIME ZONE 'UTC',
+        (month_start + INTERVAL '1 month') AT TIME ZONE 'UTC'
+    );
+    RETURN partition_name;
+END;
+$$ language 'plpgsql';
 
-CREATE INDEX IF NOT EXISTS idx_content_category ON content(category);
-CREATE INDEX IF NOT EXISTS idx_content_created_at ON content(created_at DESC);
-CREATE INDEX IF NOT EXISTS idx_content_media_type ON content(media_type);
+SELECT ensure_content_partition(CURRENT_TIMESTAMP);
+SELECT ensure_content_partition(CURRENT_TIMESTAMP + INTERVAL '1 month');
+CREATE TABLE IF NOT EXISTS content_default PARTITION OF content DEFAULT;
+
+-- Composite indexes match the read API's keyset order (created_at DESC, id DESC)
+CREATE INDEX IF NOT EXISTS idx_content_created_at_id ON content(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_content_category_created_at ON content(category, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_content_channel_created_at ON content(channel_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_content_media_type_created_at ON content(media_type, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_content_search_vector ON content USING GIN(search_vector);
+-- Dedup lookups; uniqueness across partitions cannot include created_at, so it is checked by the bot
 CREATE INDEX IF NOT EXISTS idx_content_message_channel ON content(message_id, channel_id);
 
+-- Dedup record of forwarded messages. Retention never touches it, so posts
+-- from expired partitions are not forwarded again after a restart.
+CREATE TABLE IF NOT EXISTS processed_messages (
+    message_id BIGINT NOT NULL,
+    channel_id TEXT NOT NULL,
+    processed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (message_id, channel_id)
+);
+
+-- Backfill once for installs that already have content rows
+INSERT INTO processed_messages (message_id, channel_id)
+SELECT DISTINCT message_id, channel_id FROM content
+WHERE message_id IS NOT NULL AND channel_id IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM processed_messages)
+ON CONFLICT DO NOTHING;
+
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
 BEGIN
@@ -42,4 +86,4 @@ SELECT
     created_at,
     updated_at
 FROM content
-ORDER BY created_at DESC;
+ORDER BY created_at DESC, id DESC;